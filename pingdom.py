@@ -1,10 +1,72 @@
-import json
-import os
 import sys
+import fastjsonschema
+import functools
 import requests
+import threading
+import time
 import yaml
 
-from requests import Response
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from fastjsonschema import JsonSchemaException
+from requests import HTTPError, Response
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
+
+# Prefer the libyaml C bindings when available
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+# Expected structure of the configuration YAML file
+CONFIGURATION_SCHEMA = {
+    'type': 'object',
+    'required': ['gitops', 'pingdom'],
+    'properties': {
+        'gitops': {
+            'type': 'object',
+            'required': ['type', 'version']
+        },
+        'pingdom': {
+            'type': 'object',
+            'required': ['tag', 'checks', 'teams', 'integrations'],
+            'properties': {
+                'teams': {
+                    'type': 'object',
+                    'additionalProperties': {'type': 'integer'}
+                },
+                'integrations': {
+                    'type': 'object',
+                    'additionalProperties': {'type': 'integer'}
+                },
+                'checks': {
+                    'type': 'array',
+                    'items': {'type': 'object'}
+                },
+                'default': {
+                    'type': 'object'
+                }
+            }
+        }
+    }
+}
+
+# Expected structure of each check once default values have been applied
+CHECK_SCHEMA = {
+    'type': 'object',
+    'required': ['name', 'host', 'type'],
+    'properties': {
+        'name': {'type': 'string'},
+        'host': {'type': 'string'},
+        'type': {'type': 'string'},
+        'teamids': {'type': 'array'},
+        'integrationids': {'type': 'array'}
+    }
+}
+
+# Compile schema validators once at import time
+validate_configuration_schema = fastjsonschema.compile(CONFIGURATION_SCHEMA)
+validate_check_schema = fastjsonschema.compile(CHECK_SCHEMA)
 
 
 class Pingdom:
@@ -14,6 +76,14 @@ class Pingdom:
     """
     # Define Pingdom API URL
     PINGDOM_API_URL = 'https://api.pingdom.com/api/3.1'
+    PINGDOM_API_URL_LOWER = PINGDOM_API_URL.lower()
+    PINGDOM_API_URL_LENGTH = len(PINGDOM_API_URL)
+
+    # Maximum number of concurrent requests issued to the Pingdom API (must not exceed the connection pool size)
+    MAX_WORKERS = 8
+
+    # Maximum number of requests issued to the Pingdom API per second across all threads
+    MAX_REQUESTS_PER_SECOND = 10
 
     def __init__(self, api_key):
         """
@@ -23,7 +93,31 @@ class Pingdom:
         :param api_key: Pingdom API key
         """
         self.__get_checks_cache__ = None
-        self.__api_key__ = api_key
+        self.__host_index__ = {}
+        self.__check_detail_cache__ = {}
+        self.__throttle_lock__ = threading.Lock()
+        self.__throttle_next__ = 0.0
+
+        # Share a single pooled session so the TCP/TLS connection is reused across API calls
+        self.__session__ = requests.Session()
+        self.__session__.headers.update({'Authorization': f'Bearer {api_key}'})
+        self.__session__.mount('https://', HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=max(20, Pingdom.MAX_WORKERS),
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504],
+                # Return the final response so raise_for_status() can report the Pingdom error message
+                raise_on_status=False
+            )
+        ))
+
+    def close(self) -> None:
+        """
+        Close the underlying HTTP session and release pooled connections
+        """
+        self.__session__.close()
 
     def get_checks(self, cache=True) -> list:
         """
@@ -37,20 +131,20 @@ class Pingdom:
         if cache is True and self.__get_checks_cache__ is not None:
             return self.__get_checks_cache__
 
-        response = self.__api_get__('/checks')
-
-        if response.status_code != 200:
-            raise Exception(response.content)
+        # Request tags with the list so matching does not need to fetch each check individually
+        response_json = self.__api_request__('GET', '/checks', params={'include_tags': 'true'}).json()
 
-        response_json = json.loads(response.content)
+        checks = list(response_json.get('checks', []))
 
-        checks = []
-
-        if 'checks' in response_json:
-            for check_current in response_json['checks']:
-                checks.append(check_current)
+        # Index checks by hostname so matching checks can be looked up directly
+        host_index = {}
+        for check in checks:
+            hosts = {str(check[key]).lower() for key in ('host', 'hostname') if key in check}
+            for host in hosts:
+                host_index.setdefault(host, []).append(check)
 
         self.__get_checks_cache__ = checks
+        self.__host_index__ = host_index
         return checks
 
     def create_check(self, configuration) -> None:
@@ -60,14 +154,12 @@ class Pingdom:
         :type configuration: dict
         :param configuration: Configuration of the check (refer to API documentation)
         """
-        response_create = self.__api_post__(
+        self.__api_request__(
+            method='POST',
             url='/checks',
             params=configuration
         )
 
-        if response_create.status_code != 200:
-            raise Exception(response_create.content)
-
     def update_check(self, check_id, configuration) -> None:
         """
         Update existing host check in Pingdom
@@ -79,16 +171,17 @@ class Pingdom:
         :param configuration: Configuration of the check (refer to API documentation)_
         """
         # Remove 'type' if it was supplied in the configuration (due to being lazy and copying the output from get_checks()
-        if 'type' in configuration:
-            del configuration['type']
+        # A copy is used as the same configuration may be shared by concurrent updates
+        configuration = {key: value for key, value in configuration.items() if key != 'type'}
 
-        response_create = self.__api_put__(
-            url='/checks/{check_id}'.format(check_id=check_id),
+        self.__api_request__(
+            method='PUT',
+            url=f'/checks/{check_id}',
             params=configuration
         )
 
-        if response_create.status_code != 200:
-            raise Exception(response_create.content)
+        # Discard any cached details as the check configuration has now changed
+        self.__check_detail_cache__.pop(check_id, None)
 
     def find_matching_checks(self, host, tags=None) -> list:
         """
@@ -105,16 +198,11 @@ class Pingdom:
         matches = []
 
         host = str(host).lower()
-        checks = self.get_checks()
 
-        found = []
-        for check in checks:
-            if 'host' in check:
-                if check['host'] == host:
-                    found.append(check)
-            if 'hostname' in check:
-                if check['hostname'] == host:
-                    found.append(check)
+        # Ensure the checks (and host index) have been loaded
+        self.get_checks()
+
+        found = list(self.__host_index__.get(host, ()))
 
         # If the host does not exist in the checks, die early
         if len(found) == 0:
@@ -124,73 +212,53 @@ class Pingdom:
         if tags is None or len(tags) == 0:
             return found
 
-        # Otherwise search for all tags requested
-        for check in found:
-            count_tags_found = 0
-            response_detail = self.__api_get__('/checks/{id}'.format(id=check['id']))
-
-            if response_detail.status_code != 200:
-                raise Exception(response_detail.content)
+        # Otherwise fetch the details of any candidate checks missing tags in the list response concurrently
+        with ThreadPoolExecutor(max_workers=Pingdom.MAX_WORKERS) as executor:
+            futures = {check['id']: executor.submit(self.__get_check_detail__, check['id']) for check in found if 'tags' not in check}
 
-            response_detail_json = json.loads(response_detail.content)
-            check_detail = response_detail_json['check']
+        # Wait for all lookups to finish before reporting the first failure
+        for future in futures.values():
+            if future.exception() is not None:
+                raise future.exception()
 
-            # If there are no tags defined, get out of here
-            if 'tags' not in check_detail:
-                continue
+        # Search for checks containing all tags requested
+        tags_requested = set(tags)
 
-            # Iterate all tags searching for the ones requested
-            for tag in check_detail['tags']:
-                for tag_current in tags:
-                    if tag['name'] == tag_current:
-                        count_tags_found += 1
+        for check in found:
+            check_detail = futures[check['id']].result() if check['id'] in futures else check
+            tags_present = {tag['name'] for tag in check_detail.get('tags', ())}
 
-            if count_tags_found == len(tags):
+            if tags_requested.issubset(tags_present):
                 matches.append(check)
 
         return matches
 
-    # Internal HTTP methods
-
-    def __api_delete__(self, url, params=None) -> Response:
+    def __get_check_detail__(self, check_id) -> dict:
         """
-        Post DELETE request to Pingdom API
-
-        :type url: str
-        :param url: API endpoint
+        Return detailed configuration for a single check, caching the result by check ID
 
-        :type params: dict
-        :param params: Parameters to pass to endpoint
+        :type check_id: int
+        :param check_id: The check to retrieve
 
-        :return: HTTP response
+        :return: Check details (refer to Pingdom API 3.1 documentation for contents)
         """
-        return requests.delete(
-            url=self.__get_api_endpoint_url__(url),
-            params=params,
-            headers=self.__get_auth_header__()
-        )
+        if check_id in self.__check_detail_cache__:
+            return self.__check_detail_cache__[check_id]
 
-    def __api_get__(self, url, params=None) -> Response:
-        """
-        Post GET request to Pingdom API
+        response_detail_json = self.__api_request__('GET', f'/checks/{check_id}').json()
+        check_detail = response_detail_json['check']
 
-        :type url: str
-        :param url: API endpoint
+        self.__check_detail_cache__[check_id] = check_detail
+        return check_detail
 
-        :type params: dict or None
-        :param params: Parameters to pass to endpoint
+    # Internal HTTP methods
 
-        :return: HTTP response
+    def __api_request__(self, method, url, params=None) -> Response:
         """
-        return requests.get(
-            url=self.__get_api_endpoint_url__(url),
-            params=params,
-            headers=self.__get_auth_header__()
-        )
+        Post request to Pingdom API, throwing an exception error on unsuccessful responses
 
-    def __api_post__(self, url, params=None) -> Response:
-        """
-        Post POST request to Pingdom API
+        :type method: str
+        :param method: HTTP method (e.g. GET, POST, PUT, DELETE)
 
         :type url: str
         :param url: API endpoint
@@ -200,29 +268,33 @@ class Pingdom:
 
         :return: HTTP response
         """
-        return requests.post(
+        self.__throttle__()
+
+        response = self.__session__.request(
+            method=method,
             url=self.__get_api_endpoint_url__(url),
-            params=params,
-            headers=self.__get_auth_header__()
+            params=params
         )
 
-    def __api_put__(self, url, params=None) -> Response:
-        """
-        Post PUT request to Pingdom API
-
-        :type url: str
-        :param url: API endpoint
+        try:
+            response.raise_for_status()
+        except HTTPError as http_exception:
+            # Include the Pingdom error message as the status line alone is rarely helpful
+            raise HTTPError(f'{http_exception}: {response.text}', response=response) from None
 
-        :type params: dict or None
-        :param params: Parameters to pass to endpoint
+        return response
 
-        :return: HTTP response
+    def __throttle__(self) -> None:
         """
-        return requests.put(
-            url=self.__get_api_endpoint_url__(url),
-            params=params,
-            headers=self.__get_auth_header__()
-        )
+        Block until the next request may be issued without exceeding MAX_REQUESTS_PER_SECOND
+        """
+        with self.__throttle_lock__:
+            now = time.monotonic()
+            wait = self.__throttle_next__ - now
+            self.__throttle_next__ = max(now, self.__throttle_next__) + 1 / Pingdom.MAX_REQUESTS_PER_SECOND
+
+        if wait > 0:
+            time.sleep(wait)
 
     # noinspection PyMethodMayBeStatic
     def __get_api_endpoint_url__(self, url) -> str:
@@ -234,22 +306,7 @@ class Pingdom:
 
         :return: API endpoint URL
         """
-
-        if str(url).lower().startswith(Pingdom.PINGDOM_API_URL.lower()):
-            url = url[len(Pingdom.PINGDOM_API_URL):]
-
-        return '{api_url}/{url}'.format(
-            api_url=Pingdom.PINGDOM_API_URL,
-            url=url.lstrip('/')
-        )
-
-    def __get_auth_header__(self) -> dict:
-        """
-        Return API authentication header
-
-        :return: Dictionary containing Pingdom authentication header
-        """
-        return {'Authorization': 'Bearer {api_key}'.format(api_key=self.__api_key__)}
+        return get_api_endpoint_url(str(url))
 
     @staticmethod
     def validate_configuration_yaml(configuration):
@@ -260,19 +317,14 @@ class Pingdom:
         :param configuration: The configuration as read from the YAML file
         """
 
-        # Validate `gitops` configuration in YAML file
-
-        if 'gitops' not in configuration:
-            raise Exception('Unexpected file type: Could not locate required `gitops` tag')
+        # Validate the overall structure of the YAML file
 
-        config_gitops = configuration['gitops']
+        try:
+            validate_configuration_schema(configuration)
+        except JsonSchemaException as schema_exception:
+            raise Exception(f'Configuration Error: {schema_exception.message}')
 
-        if isinstance(config_gitops, dict) is False:
-            raise Exception('Configuration Error: Invalid `gitops` tag type, expected YAML object')
-
-        for parameter in ['type', 'version']:
-            if parameter not in config_gitops:
-                raise Exception('Configuration Error: Could not locate required `gitops.{parameter}` tag'.format(parameter=parameter))
+        # Validate `gitops` values in YAML file
 
         gitops_type = configuration['gitops']['type']
         if gitops_type != 'pingdom-checks':
@@ -282,56 +334,11 @@ class Pingdom:
         if gitops_version not in ['1.0']:
             raise Exception('Unexpected file type: The file version was not recognized')
 
-        # Validate `pingdom` configuration in YAML file
-
-        if 'pingdom' not in configuration:
-            raise Exception('Configuration Error: Could not locate required `pingdom` tag')
-
-        config_pingdom = configuration['pingdom']
-
-        if isinstance(config_pingdom, dict) is False:
-            raise Exception('Configuration Error: Invalid `pingdom` tag type, expected YAML object')
-
-        for parameter in ['tag', 'checks', 'teams', 'integrations']:
-            if parameter not in config_pingdom:
-                raise Exception('Configuration Error: Could not locate required `pingdom.{parameter}` tag'.format(parameter=parameter))
-
-        # Validate `pingdom.teams` configuration in YAML file
-
-        teams = {}
-        if 'teams' in config_pingdom:
-            if isinstance(config_pingdom['teams'], dict) is False:
-                raise Exception('Configuration Error: Invalid `pingdom.teams` tag type, expected YAML object')
-
-            # Iterate over teams and store in dictionary
-            for team_key, team_id in config_pingdom['teams'].items():
-                if isinstance(team_id, int) is False:
-                    raise Exception('Configuration Error: Invalid `pingdom.teams` ID type, expected integer')
-                teams[team_key] = team_id
-
-        # Validate `pingdom.integrations` configuration in YAML file
-
-        integrations = {}
-        if 'integrations' in config_pingdom:
-            if isinstance(config_pingdom['integrations'], dict) is False:
-                raise Exception('Configuration Error: Invalid `pingdom.integrations` tag type, expected YAML object')
-
-            # Iterate over integrations and store in dictionary
-            for integration_key, integration_id in config_pingdom['integrations'].items():
-                if isinstance(integration_id, int) is False:
-                    raise Exception('Configuration Error: Invalid `pingdom.integrations` ID type, expected integer')
-                integrations[integration_key] = integration_id
-
         # Validate `pingdom.checks` configuration in YAML file
 
-        config_pingdom_checks = config_pingdom['checks']
-
-        if isinstance(config_pingdom_checks, list) is False:
-            raise Exception('Configuration Error: Invalid `pingdom.checks` tag type, expected YAML list')
-
-        if 'default' in config_pingdom:
-            if isinstance(config_pingdom['default'], dict) is False:
-                raise Exception('Configuration Error: Invalid `pingdom.default` item type, expected YAML object')
+        config_pingdom = configuration['pingdom']
+        teams = config_pingdom['teams']
+        integrations = config_pingdom['integrations']
 
         default = {
             'auth': '',
@@ -361,51 +368,32 @@ class Pingdom:
             for key, value in config_pingdom['default'].items():
                 default[key] = value
 
-        for check in config_pingdom_checks:
-            # Populate default values
-            if default is not None:
-                for key, value in default.items():
-                    if key not in check:
-                        check[key] = value
-
-            if isinstance(config_pingdom_checks, list) is False:
-                raise Exception('Configuration Error: Invalid `pingdom.checks` list item type, expected YAML list')
+        # Populate default values (processing relies on the checks having been merged here)
+        config_pingdom['checks'] = [{**default, **check} for check in config_pingdom['checks']]
 
-            # Ensure mandatory check parameters are present
-            for parameter in ['name', 'host', 'type']:
-                if parameter not in check:
-                    raise Exception('Configuration Error: Could not locate mandatory `{parameter}` value in check'.format(parameter=parameter))
-                if isinstance(check[parameter], str) is False:
-                    raise Exception('Configuration Error: Invalid data type `{parameter}` in check, expected string value'.format(parameter=parameter))
+        for check in config_pingdom['checks']:
+            # Ensure mandatory check parameters are present and of the expected types
+            try:
+                validate_check_schema(check)
+            except JsonSchemaException as schema_exception:
+                raise Exception(f'Configuration Error: Invalid check, {schema_exception.message}')
 
             # If `teamids` were specified in the check, make sure they exist in the YAML file
-            if 'teamids' in check:
-                teamids = check['teamids']
-                if isinstance(teamids, list) is False:
-                    raise Exception('Configuration Error: Invalid data type `teamids` in check, expected YAML list'.format(parameter=parameter))
-
-                for team_key in teamids:
-                    if team_key not in teams:
-                        raise Exception('Configuration Error: Unknown `teamids` name specified in check, ensure ID defined in `pingdom.teams` tag'.format(
-                            parameter=parameter))
+            for team_key in check.get('teamids', []):
+                if team_key not in teams:
+                    raise Exception('Configuration Error: Unknown `teamids` name specified in check, ensure ID defined in `pingdom.teams` tag')
 
             # If `integrationids` were specified in the check, make sure they exist in the YAML file
-            if 'integrationids' in check:
-                integrationids = check['integrationids']
-                if isinstance(integrationids, list) is False:
-                    raise Exception('Configuration Error: Invalid data type `integrationids` in check, expected YAML list'.format(parameter=parameter))
-
-                for integration_key in integrationids:
-                    if integration_key not in integrations:
-                        raise Exception(
-                            'Configuration Error: Unknown `integrationids` name specified in check, ensure ID defined in `pingdom.integrations` tag'.format(
-                                parameter=parameter))
+            for integration_key in check.get('integrationids', []):
+                if integration_key not in integrations:
+                    raise Exception(
+                        'Configuration Error: Unknown `integrationids` name specified in check, ensure ID defined in `pingdom.integrations` tag')
 
     @staticmethod
     def process_configuration_yaml(configuration) -> None:
         """
         Process configuration file and create/update Pingdom health checks as appropriate
-        Perform some primitive validation on the configuration, throwing an exception error on failure
+        The configuration must have been passed through validate_configuration_yaml() first so default values are populated
 
         :type configuration: dict
         :param configuration: The configuration as read from the YAML file
@@ -415,71 +403,83 @@ class Pingdom:
         integrations = configuration['pingdom']['integrations']
 
         error = False
-
-        if 'default' in configuration['pingdom']:
-            default = configuration['pingdom']['default']
-        else:
-            default = None
+        creates = []
+        updates = {}
 
         for check in configuration['pingdom']['checks']:
-            # Populate default values
-            if default is not None:
-                for key, value in default.items():
-                    if key not in check:
-                        check[key] = value
-
             host = check['host']
 
-            # If team IDs were specified, convert them into their integer values
-            tag_csv = '{tag},'.format(tag=tag)
-            if 'tags' in check:
-                for tag_current in check['tags']:
-                    tag_csv += '{tag_current},'.format(tag_current=tag_current)
-                check['tags'] = tag_csv.rstrip(',')
+            # Always apply the managed tag so the check can be located on subsequent runs
+            check['tags'] = ','.join([tag] + list(check.get('tags', [])))
 
             # If team IDs were specified, convert them into their integer values
             if 'teamids' in check:
-                team_ids_csv = ''
-                for team_key in check['teamids']:
-                    team_ids_csv += '{team_key},'.format(team_key=teams[team_key])
-                check['teamids'] = team_ids_csv.rstrip(',')
+                check['teamids'] = ','.join(str(teams[team_key]) for team_key in check['teamids'])
 
             # If integration IDs were specified, convert them into their integer values
             if 'integrationids' in check:
-                integration_ids_csv = ''
-                for integration_key in check['integrationids']:
-                    integration_ids_csv += '{integration_key},'.format(integration_key=integrations[integration_key])
-                check['integrationids'] = integration_ids_csv.rstrip(',')
+                check['integrationids'] = ','.join(str(integrations[integration_key]) for integration_key in check['integrationids'])
 
             matches = pingdom.find_matching_checks(host=host, tags=[tag])
 
             if len(matches) == 0:
-                try:
-                    # Create the new check
-                    print('Creating Check: {host}'.format(host=host))
-                    pingdom.create_check(configuration=check)
-                except Exception as create_exception:
-                    # Continue on failure but log the output
-                    print('WARNING: Failed to create Pingdom health check')
-                    print('{create_exception}'.format(create_exception=create_exception))
+                creates.append(check)
             else:
+                # Group updates by check ID so entries targeting the same check are applied in file order
+                for check_current in matches:
+                    updates.setdefault(check_current['id'], []).append(check)
+
+        def update_checks(check_id, checks) -> None:
+            for check in checks:
+                pingdom.update_check(check_id=check_id, configuration=check)
+
+        # Submit all changes concurrently over the shared session
+        with ThreadPoolExecutor(max_workers=Pingdom.MAX_WORKERS) as executor:
+            futures = {}
+
+            for check in creates:
+                # Create the new check
+                print(f'Creating Check: {check["host"]}')
+                futures[executor.submit(pingdom.create_check, configuration=check)] = ('create', check['host'])
+
+            for check_id, checks in updates.items():
+                # Update the existing check
+                print(f'Updating Check: {checks[0]["host"]}')
+                futures[executor.submit(update_checks, check_id, checks)] = ('update', checks[0]['host'])
+
+            for future in as_completed(futures):
+                action, host = futures[future]
                 try:
-                    for check_current in matches:
-                        # Update the existing check
-                        print('Updating Check: {host}'.format(host=host))
-                        check_id = check_current['id']
-                        pingdom.update_check(check_id=check_id, configuration=check)
-
+                    future.result()
                 except Exception as create_exception:
                     # Continue on failure but log the output
-                    print('WARNING: Failed to update existing Pingdom health check')
-                    print('{create_exception}'.format(create_exception=create_exception))
+                    if action == 'create':
+                        print(f'WARNING: Failed to create Pingdom health check: {host}')
+                    else:
+                        print(f'WARNING: Failed to update existing Pingdom health check: {host}')
+                    print(create_exception)
                     error = True
 
         if error is True:
             raise Exception('Update completed with one or more errors- please review logs messages')
 
 
+@functools.lru_cache(maxsize=256)
+def get_api_endpoint_url(url) -> str:
+    """
+    Return API endpoint URL, memoized as only a handful of distinct endpoints are used
+
+    :type url: str
+    :param url: The user supplied endpoint
+
+    :return: API endpoint URL
+    """
+    if url.lower().startswith(Pingdom.PINGDOM_API_URL_LOWER):
+        url = url[Pingdom.PINGDOM_API_URL_LENGTH:]
+
+    return f'{Pingdom.PINGDOM_API_URL}/{url.lstrip("/")}'
+
+
 def print_usage() -> None:
     """
     Print usage on argument errors
@@ -489,6 +489,8 @@ def print_usage() -> None:
 
 
 if __name__ == '__main__':
+    pingdom = None
+
     try:
         # Validate command-line arguments
         if len(sys.argv) != 3:
@@ -498,19 +500,18 @@ if __name__ == '__main__':
         filename = sys.argv[1]
         api_key = sys.argv[2]
 
-        if os.path.exists(filename) is False:
-            print('ERROR: Configuration file ({filename}) not found\n'.format(filename=filename))
+        # Load the YAML file contents from disk
+        try:
+            with open(filename, 'rb') as pingdom_config:
+                configuration_yaml = yaml.load(pingdom_config, Loader=YamlLoader)
+        except FileNotFoundError:
+            print(f'ERROR: Configuration file ({filename}) not found\n')
             print_usage()
             exit(2)
 
         # Setup Pingdom API
         pingdom = Pingdom(api_key=api_key)
 
-        # Load the YAML file contents from disk
-        pingdom_config = open(filename, 'rt')
-        configuration_yaml = yaml.full_load(pingdom_config.read())
-        pingdom_config.close()
-
         # Validate the YAML file contents
         Pingdom.validate_configuration_yaml(configuration_yaml)
 
@@ -521,3 +522,6 @@ if __name__ == '__main__':
         print('ERROR: Unhandled exception error during YAML file processing')
         print(exception)
         exit(3)
+    finally:
+        if pingdom is not None:
+            pingdom.close()